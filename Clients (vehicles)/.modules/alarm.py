@@ -1,7 +1,10 @@
+import ctypes
 import json
 import os
 import time
 from gpiozero import LED
+import inotify.adapters
+import inotify.constants
 from threading import Thread, Event
 from signal import signal, SIGTERM
 
@@ -13,19 +16,41 @@ led = LED(pin_number)
 stop_event = Event()
 toggle_thread = None
 toggle_flag_file = '/tmp/alarm_toggle.flag'
+toggle_flag_dir, toggle_flag_name = os.path.split(toggle_flag_file)
+
+# Blink pattern as (seconds from cycle start, LED state), repeated every blink_cycle seconds
+blink_pattern = [(0.0, False), (0.35, True), (0.7, False), (1.05, True)]
+blink_cycle = 1.75
+
+# prctl option and value (in nanoseconds) used to tighten the wakeup precision of timed waits
+PR_SET_TIMERSLACK = 29
+timer_slack_ns = 1000
+
+def set_timer_slack():
+    """Reduce the Linux timer slack so the blink deadlines are met precisely."""
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.prctl(PR_SET_TIMERSLACK, timer_slack_ns, 0, 0, 0)
+    except (OSError, AttributeError):
+        pass
 
 def toggle_led():
     """Function to toggle the LED on and off at intervals."""
-    while not stop_event.is_set():
-        led.off()
-        time.sleep(0.35)
-        led.on()
-        
-        led.off()
-        time.sleep(0.35)
-        led.on()
-        
-        time.sleep(0.7)
+    cycle_start = time.monotonic()
+    while True:
+        for offset, state in blink_pattern:
+            # Wait for the absolute deadline of the phase, so the period doesn't drift, or stop early
+            if stop_event.wait(max(0, cycle_start + offset - time.monotonic())):
+                return
+            if state:
+                led.on()
+            else:
+                led.off()
+
+        # Move to the next cycle, restarting from now if we fell behind
+        cycle_start += blink_cycle
+        if cycle_start < time.monotonic():
+            cycle_start = time.monotonic()
 
 def handle_signal(signum, frame):
     """Handle termination signal."""
@@ -41,22 +66,35 @@ def check_flag_file():
     """Check if the toggle flag file exists."""
     return os.path.exists(toggle_flag_file)
 
+def update_toggle():
+    """Start or stop toggling the LED according to the flag file."""
+    global toggle_thread
+    if check_flag_file():
+        if toggle_thread is None or not toggle_thread.is_alive():
+            stop_event.clear()
+            toggle_thread = Thread(target=toggle_led)
+            toggle_thread.start()
+    else:
+        if toggle_thread and toggle_thread.is_alive():
+            stop_event.set()
+            toggle_thread.join()
+        led.on()
+
 def run():
     """Main function to run the LED toggle service."""
-    global toggle_thread
+    set_timer_slack()  # Inherited by the toggle threads
     signal(SIGTERM, handle_signal)
-    while True:
-        if check_flag_file():
-            if toggle_thread is None or not toggle_thread.is_alive():
-                stop_event.clear()
-                toggle_thread = Thread(target=toggle_led)
-                toggle_thread.start()
-        else:
-            if toggle_thread and toggle_thread.is_alive():
-                stop_event.set()
-                toggle_thread.join()
-            led.on()
-        time.sleep(0.1)
+
+    # Block on inotify events for the flag file instead of polling for it (no periodic epoll wakeups)
+    watcher = inotify.adapters.Inotify(block_duration_s=None)
+    watcher.add_watch(toggle_flag_dir, mask=inotify.constants.IN_CREATE | inotify.constants.IN_DELETE |
+                      inotify.constants.IN_MOVED_TO | inotify.constants.IN_MOVED_FROM)
+
+    # Apply the current state, the flag file may already exist
+    update_toggle()
+    for _, _, _, filename in watcher.event_gen(yield_nones=False):
+        if filename == toggle_flag_name:
+            update_toggle()
 
 if __name__ == '__main__':
     run()
@@ -9,33 +9,55 @@ creating vectors, and controlling warning lights.
 Dependencies:
     - config
     - locServerRequests
-    - dataProcessing
+    - locServerFeed
+    - tagStore
     - lightsController_gpioserver or lightsController_gpiozero
-    - paho.mqtt.publish
+    - paho.mqtt.client
+    - ctypes
+    - logging
+    - threading
     - time
-    - json
+    - orjson (optional, falls back to json)
 """
 
-from config import MQTT_IP, MQTT_PORT
+from config import MQTT_IP, MQTT_PORT, MQTT_CLIENTS, RTLS_RESYNC_PERIOD
 from locServerRequests import GetAllTags
-from dataProcessing import createObject, updateObject, create_vector
+from locServerFeed import start_feed
+from tagStore import TagStore
 from lightsController_gpioserver import check_zones, set_all_lights
 #from lightsController_gpiozero import check_zones, set_all_lights
-import paho.mqtt.publish as pub
-from time import sleep
-from json import dumps
+import paho.mqtt.client as mqtt
+import ctypes
+import logging
+from threading import Lock
+from time import sleep, monotonic
+
+try:
+    # orjson serializes several times faster than json and produces bytes directly
+    from orjson import dumps
+except ImportError:
+    from json import dumps
+
+logger = logging.getLogger(__name__)
+
+# Period of the working loop in seconds
+LOOP_PERIOD = 0.15
+
+# prctl option and value (in nanoseconds) used to tighten the wakeup precision of timed sleeps
+PR_SET_TIMERSLACK = 29
+TIMER_SLACK_NS = 1000
 
 
 def initialize_objects():
     """
     Initialize objects for all tags retrieved from the location server.
 
-    Retrieves tag data from the location server and creates an object for each tag using the `createObject` function.
+    Retrieves tag data from the location server and adds an object for each tag to a new `TagStore`.
 
     Returns:
-        dict: A dictionary where keys are object IDs and values are the initialized objects.
+        TagStore: The store holding the initialized objects, indexed by object ID.
     """
-    obj_dict = {}  # Initialize an empty dictionary to store objects
+    store = TagStore()  # Initialize an empty store for the objects
 
     try:
         # Retrieve all tags from the location server
@@ -46,149 +68,242 @@ def initialize_objects():
             # Convert the tag ID to an integer
             result_id = int(result['id'])
 
-            # Create an object for each tag and add it to the dictionary
-            obj_dict[result_id] = createObject(result_id, result)
+            # Create an object for each tag and add it to the store
+            store.add(result_id, result)
 
     except Exception as e:
-        # Print an error message if an exception occurs during initialization
-        print(f"Failed to initialize objects: {str(e)}")
+        # Log an error message if an exception occurs during initialization
+        logger.error("Failed to initialize objects: %s", e)
 
-    return obj_dict
+    return store
 
 
-def update_objects(obj_dict):
+def update_objects(store, response):
     """
     Update existing objects with the latest data from the location server.
 
-    Retrieves updated tag data from the location server and applies changes to objects that exist in the provided dictionary.
+    Applies the tag data retrieved from the location server to objects that exist in the provided store.
+    The data is fetched by the caller, so the request doesn't have to be made while holding the lock of the store.
+    The response is only read, as it may be the data cached by `GetAllTags`.
 
     Args:
-        obj_dict (dict): The dictionary of objects to update, where keys are object IDs and values are the objects.
+        store (TagStore): The store of objects to update.
+        response (dict or None): The response of `GetAllTags`, None if the request failed.
 
     Returns:
         None
     """
     try:
-        # Retrieve all tags from the location server
-        response = GetAllTags()
-
         # Process each tag in the response
         for result in response.get('results', []):
             # Convert the tag ID to an integer
             result_id = int(result['id'])
 
-            # Check if the object with the given ID exists in the dictionary
-            if result_id in obj_dict:
+            # Check if the object with the given ID exists in the store
+            if result_id in store:
                 # Update the existing object with the new data
-                updateObject(obj_dict[result_id], result)
+                store.update(result_id, result)
 
     except Exception as e:
-        # Print an error message if an exception occurs during the update process
-        print(f"Failed to update objects: {str(e)}")
+        # Log an error message if an exception occurs during the update process
+        logger.error("Failed to update objects: %s", e)
 
 
-def create_vectors(obj_dict):
+def apply_tag_update(store, update):
+    """
+    Update an existing object with a tag record pushed by the location server feed.
+
+    The pushed record is merged into the last full record of the tag, as it may only carry the changed datastreams.
+
+    Args:
+        store (TagStore): The store of objects to update.
+        update (dict): The tag record pushed by the location server.
+
+    Returns:
+        None
+    """
+    try:
+        # Convert the tag ID to an integer
+        result_id = int(update['id'])
+
+        # Check if the object with the given ID exists in the store
+        if result_id in store:
+            # Update the existing object with the merged data
+            store.merge(result_id, update)
+
+    except Exception as e:
+        # Log an error message if an exception occurs during the update process
+        logger.error("Failed to apply tag update: %s", e)
+
+
+def create_vectors(store):
     """
     Create vectors between tags and store them in the objects.
 
     Calculates vectors between each tag and all other tags and updates the objects with these vectors.
 
     Args:
-        obj_dict (dict): A dictionary where keys are object IDs and values are the objects to create vectors for.
+        store (TagStore): The store of objects to create vectors for.
 
     Returns:
         None
     """
     try:
-        # Iterate over each object ID in the dictionary
-        for this_id in obj_dict.keys():
-            vectors_array = []  # Initialize a list to store vectors for the current object
-
-            # Compare the current object with every other object
-            for other_id, other_obj in obj_dict.items():
-                # Skip vector creation if comparing the object with itself
-                if other_id != this_id:
-                    # Create a vector between the current object and another object
-                    vector = create_vector(obj_dict[this_id], other_obj)
-                    # Add the created vector to the list
-                    vectors_array.append(vector)
-
-            # Update the current object with the list of vectors
-            obj_dict[this_id]['vct'] = vectors_array
+        # Calculate the vectors of all objects in one pass over the store columns
+        store.update_vectors()
 
     except Exception as e:
-        # Print an error message if an exception occurs during vector creation
-        print(f"Failed to create vectors: {str(e)}")
+        # Log an error message if an exception occurs during vector creation
+        logger.error("Failed to create vectors: %s", e)
+
+
+def connect_mqtt():
+    """
+    Create a pool of persistent connections to the MQTT broker.
+
+    Each client's network loop runs in its own background thread, so the connections are kept alive
+    and reused for every telemetry cycle instead of reconnecting for each message, and the messages of
+    one cycle are written to MQTT_CLIENTS sockets in parallel.
+    The connections are established by the network threads, which keep retrying while the broker is
+    unreachable (e.g. not started yet at boot); until then the telemetry messages are dropped.
+
+    Returns:
+        list: The MQTT clients, connected or connecting.
+    """
+    clients = []
+
+    for _ in range(MQTT_CLIENTS):
+        client = mqtt.Client()
+        client.connect_async(MQTT_IP, MQTT_PORT)
+        client.loop_start()  # Handle the connection, network traffic and reconnects in a background thread
+        clients.append(client)
 
+    return clients
 
-def send_telemetry(obj_dict):
+
+def send_telemetry(clients, obj_dict):
     """
     Send telemetry data for all objects to the MQTT broker.
 
-    Publishes the telemetry data for each object to the specified MQTT broker. 
-    Introduces a slight delay between messages to avoid overwhelming the broker.
+    Publishes the telemetry data for each object through the pool of persistent MQTT clients, round-robin.
+    Messages are queued to the clients' network threads, so publishing never waits on the network.
+    Objects keep their position in the dictionary, so each topic is always published by the same client
+    and the order of its messages is preserved.
 
     Args:
+        clients (list): The MQTT clients returned by `connect_mqtt`.
         obj_dict (dict): A dictionary where keys are object IDs and values are the telemetry data to be sent.
 
     Returns:
         None
     """
     # Iterate over each object in the dictionary
-    for key, value in obj_dict.items():
-        # Slight delay between publishing messages to avoid overwhelming the broker
-        sleep(0.05)
-
+    for i, (key, value) in enumerate(obj_dict.items()):
         try:
             # Publish the telemetry data to the MQTT broker
-            pub.single(str(key), payload=dumps(value),
-                       hostname=MQTT_IP, port=MQTT_PORT)
+            clients[i % len(clients)].publish(str(key), payload=dumps(value), qos=0)
         except Exception as e:
-            # Print an error message if publishing fails
-            print(f"Failed to publish to topic '{key}': {e}")
+            # Log an error message if publishing fails
+            logger.error("Failed to publish to topic '%s': %s", key, e)
+
+
+def set_timer_slack():
+    """
+    Reduce the Linux timer slack of the process so the working loop wakes up on schedule.
+
+    Has no effect on systems without prctl.
+    """
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.prctl(PR_SET_TIMERSLACK, TIMER_SLACK_NS, 0, 0, 0)
+    except (OSError, AttributeError):
+        pass
 
 
 def main():
     """
     Main function to run the application.
 
-    This function initializes the system, including lights and objects, and then enters a continuous loop where it:
-    1. Updates the object data from the location server.
+    This function initializes the system, including lights and objects, and subscribes to the location server feed,
+    which updates the objects as soon as tags move. It then enters a continuous loop where it:
+    1. Polls the object data from the location server while the feed is down, and periodically to resync.
     2. Creates vectors between objects.
-    3. Controls warning lights based on object zones.
-    4. Sends updated telemetry data to the MQTT broker.
+    3. Sends updated telemetry data to the MQTT broker.
+    4. Controls warning lights based on object zones.
 
     The function handles any exceptions that occur during execution and logs error messages.
     """
+    logging.basicConfig(level=logging.INFO)
+
     try:
+        # Tighten timer precision, inherited by the threads started below
+        set_timer_slack()
+
         # Initialize lights
         set_all_lights(False)  # Turn lights ON
+        sleep(1)               # Keep the lamp test visible
         set_all_lights(True)   # Turn lights OFF
 
         # Initialize objects
-        obj_dict = initialize_objects()
+        store = initialize_objects()
+
+        # Subscribe to the location server feed, guarding the objects shared with the feed thread
+        lock = Lock()
+
+        def on_tag(update):
+            with lock:
+                apply_tag_update(store, update)
+
+        feed_connected = start_feed(on_tag)
+        last_resync = monotonic()
+        last_response = None
+
+        # Connect to the MQTT broker
+        mqtt_clients = connect_mqtt()
 
         # Enter the working loop
+        next_tick = monotonic()
         while True:
-            # Delay between iterations to manage the frequency of updates
-            sleep(0.15)
+            # Poll the location server if the feed is down, or resync periodically.
+            # The blocking requests are made outside the lock, so a stalled server doesn't hold up the feed thread.
+            if not feed_connected.is_set() or monotonic() - last_resync >= RTLS_RESYNC_PERIOD:
+                response = GetAllTags()
+
+                # An unchanged response (304 Not Modified) is the same object as the previous one, already applied
+                if response is not None and response is not last_response:
+                    with lock:
+                        update_objects(store, response)
+                    last_response = response
+                last_resync = monotonic()
+
+            with lock:
+                # Create vectors for each object relative to other objects
+                create_vectors(store)
+
+                # Log the state of all objects, only formatted when debugging
+                logger.debug("state: %r", store.objects)
 
-            # Update objects with the latest data from the location server
-            update_objects(obj_dict)
+                # Get the current zones of objects
+                penetrated_zones = store.penetrated_zones()
 
-            # Create vectors for each object relative to other objects
-            create_vectors(obj_dict)
+                # Send telemetry data for each object to the MQTT broker
+                send_telemetry(mqtt_clients, store.objects)
 
             # Control warning lights based on the current zones of objects
-            print(obj_dict)
-            check_zones(obj_dict)
+            check_zones(penetrated_zones)
 
-            # Send telemetry data for each object to the MQTT broker
-            send_telemetry(obj_dict)
+            # Wait for the next iteration on an absolute schedule, so the work time doesn't stretch the period
+            next_tick += LOOP_PERIOD
+            delay = next_tick - monotonic()
+            if delay > 0:
+                sleep(delay)
+            else:
+                # Restart the schedule if an iteration overran
+                next_tick = monotonic()
 
     except Exception as e:
-        # Print an error message if an exception occurs
-        print(f"Main application error: {str(e)}")
+        # Log an error message if an exception occurs
+        logger.error("Main application error: %s", e)
 
 
 if __name__ == "__main__":
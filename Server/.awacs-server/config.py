@@ -18,8 +18,20 @@ RTLS_IP = "192.168.10.112"
 RTLS_PORT = "8080"
 # API key for accessing the RTLS server
 RTLS_X_API_KEY = "gduVczl0kn1TBeMOKuYQIygrt"
+# Seconds to wait for connecting to, and for a response from, the RTLS server HTTP API
+RTLS_TIMEOUT = (1, 5)
+# Maximum number of concurrent requests to the RTLS server HTTP API
+RTLS_MAX_WORKERS = 16
 # Port number for the RTLS server WebSocket API
 RTLS_WS_PORT = "8080"
+# Seconds to wait before reconnecting to the RTLS server WebSocket API
+RTLS_WS_RECONNECT_DELAY = 1
+# Seconds without any tag record after which the WebSocket feed is considered stale, and the HTTP API polled again
+RTLS_WS_STALE_TIMEOUT = 1
+# Seconds between full HTTP resyncs while the WebSocket feed is connected.
+# The resync also refreshes the zones driving the warning lights, which pushed records may not carry, so this is
+# kept at the working loop period (0.15 s) for the same light latency as polling; unchanged data costs only a 304.
+RTLS_RESYNC_PERIOD = 0.15
 
 # DATA PROCESSING
 # IGNORE POSITION CHANGES EQUAL OR LESS THAN:
@@ -36,6 +48,8 @@ BAD_SIGNAL_ZONES = [BSZ1]
 MQTT_IP = "192.168.20.150"
 # Port number for the MQTT broker
 MQTT_PORT = 1884
+# Number of parallel MQTT connections used to publish telemetry
+MQTT_CLIENTS = 4
 
 # LIGHTS CONTROLLER
 # IP address of the GPIO server for lights control
@@ -44,6 +58,8 @@ GPIO_SERVER_IP = "192.168.10.150"
 GPIO_SERVER_PORT = "4000"
 # Mapping of light zone identifiers to GPIO pins
 ZONE_PIN_MAP = {"LZ1": 2, "LZ2": 3, "LZ3": 14, "LZ4": 4}
+# Seconds between full resends of all light states (unchanged lights are otherwise not resent)
+LIGHTS_REFRESH_PERIOD = 5
 
 
 # DO NOT CHANGE
@@ -66,3 +82,5 @@ RTLS_WS_SUB_COMMAND = {
 GPIO_SERVER_HEADER = {"Content-Type": "application/json"}
 # Constructed URL for the GPIO server API
 GPIO_SERVER_URL = f"http://{GPIO_SERVER_IP}:{GPIO_SERVER_PORT}/gpio/control"
+# Constructed URL for the GPIO server batch API (one request for several pins)
+GPIO_SERVER_BATCH_URL = f"http://{GPIO_SERVER_IP}:{GPIO_SERVER_PORT}/gpio/control_batch"
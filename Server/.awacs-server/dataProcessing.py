@@ -6,12 +6,20 @@ This module contains functions for creating and updating objects and processing
 
 Dependencies:
 - geometricFunctions: Module containing geometric calculation functions.
+- numpy: Library for vectorized array operations.
+- logging: Standard Python library for reporting parsing errors.
 """
 
+import logging
+import math
 from datetime import datetime
-from geometricFunctions import calculate_angle, calculate_distance, calculate_heading, calculate_speed
+from functools import lru_cache
+import numpy as np
+from geometricFunctions import calculate_heading, calculate_speed, calculate_vectors
 from config import POS_FLUCTUATION_FILTER
 
+logger = logging.getLogger(__name__)
+
 
 def createObject(id, data):
     """
@@ -24,16 +32,8 @@ def createObject(id, data):
     Returns:
         dict: The initialized object.
     """
-    # Extract position (X, Y) from data
-    pos = (_extract_pos(data, 'posX'), _extract_pos(data, 'posY'))
-    # Extract timestamp from data
-    tms = _extract_tms(data)
-    # Extract moving zone names from data
-    mvz = _extract_zone_names(data, 'M')
-    # Extract warning lights zone names from data
-    liz = _extract_zone_names(data, 'L')
-    # Extract bad signal zone names from data
-    bsz = _extract_zone_names(data, 'B')
+    # Extract position (X, Y), timestamp and moving / warning lights / bad signal zone names from data
+    pos, tms, mvz, liz, bsz = _parse_record(data)
 
     # Create the object with the extracted and default values
     obj = {
@@ -67,27 +67,30 @@ def updateObject(obj, data):
     Returns:
         dict: The updated object.
     """
+    # Extract current position (X, Y), timestamp and zone names from data
+    pos, tms, mvz, liz, bsz = _parse_record(data)
 
-    # Update only if tag has moved more than the standart fluctuation inaccuaracy
-    if (calculate_distance((_extract_pos(data, 'posX'), _extract_pos(data, 'posY')), obj.get('pos')) >= POS_FLUCTUATION_FILTER or obj.get('pos') == None):
-
-        # Extract current position (X, Y) from data
-        pos = (_extract_pos(data, 'posX'), _extract_pos(data, 'posY'))
+    # Set current position and timestamp as previous
+    his_pos = obj['pos']
+    his_tms = obj['tms']
+    his_known = None not in his_pos
 
-        # Extract current timestamp from data
-        tms = _extract_tms(data)
+    # Ignore a position older than the current one (e.g. a resync snapshot requested before the last feed push),
+    # so it can't move the tag back and reverse its heading. Zones are still applied below.
+    stale = tms is not None and his_tms is not None and tms < his_tms
 
-        # Set current position and timestamp as previous
-        his_pos = obj.get('pos')
-        his_tms = obj.get('tms')
+    # Update only if the new position is known and the previous one is not, or if the tag has moved
+    # more than the standart fluctuation inaccuaracy (checked last, as it is the costly comparison)
+    if None not in pos and not stale and (not his_known or
+                                          math.hypot(pos[0] - his_pos[0], pos[1] - his_pos[1]) >= POS_FLUCTUATION_FILTER):
 
         # Calculate speed if both current and historical timestamps are available
         # If tms == his_tms and <> of None, means that posX or posY haven't changed so spd = 0
         spd = calculate_speed(his_pos, his_tms, pos,
-                              tms) if tms and his_tms else 0
-        # Calculate heading if current and historical positions are different
+                              tms) if his_known and tms is not None and his_tms is not None else 0
+        # Calculate heading if the historical position is known and different from the current one
         hdg = calculate_heading(
-            his_pos, pos) if pos and his_pos and pos != his_pos else obj['hdg']
+            his_pos, pos) if his_known and pos != his_pos else obj['hdg']
 
         # Update the object with new values
         obj.update({
@@ -101,136 +104,152 @@ def updateObject(obj, data):
             'hdg': hdg      # Update heading
         })
 
-    # Extract monitored zone names from data
-    mvz = _extract_zone_names(data, 'M')
-    # Extract location zone names from data
-    liz = _extract_zone_names(data, 'L')
-    # Extract bad signal zone names from data
-    bsz = _extract_zone_names(data, 'B')
-
     # Update the object with new values
     obj.update({
         "mvz": mvz,     # Monitored zones
         "liz": liz,     # Location zones
-        "bsz": bsz,      # Bad signal zones
-        'vct': []        # Reset vectors
+        "bsz": bsz       # Bad signal zones
     })
 
     return obj
 
 
-def create_vector(obj, other_obj):
+def merge_record(record, update):
     """
-    Create a vector between two objects.
+    Merge a tag record pushed by the RTLS feed into the last known full record of the tag.
+
+    Pushed records may only carry the datastreams that changed, so datastreams are merged by ID
+    while all other keys present in the update replace the previous values.
 
     Args:
-        obj (dict): The source object.
-        other_obj (dict): The target object.
+        record (dict): The last known full record of the tag.
+        update (dict): The (possibly partial) record pushed by the location server.
 
     Returns:
-        dict: The vector containing direction and radius.
+        dict: The merged record.
     """
-    my_pos = obj.get('pos')  # Position of the source object
-    my_hdg = obj.get('hdg')  # Heading of the source object
-    other_pos = other_obj.get('pos')  # Position of the target object
-    # Calculate the direction angle if the heading is known.
+    merged = {**record, **update}
 
-    # direction = -1 means that the angle between two vehicles cannot be calculated as we don't know the heading of this vehicle,
-    # direction = -2 means that the other vehicle is inside a fuzzy position zone.
-    # direction = -3 means that both vehicles are inside a fuzzy position zone.
-    contactIsFuzzy = False
-    direction = calculate_angle(my_pos, other_pos, my_hdg) if my_hdg else -1
-    if (other_obj['bsz'] != []):
-        contactIsFuzzy = True
-    if (obj['bsz'] != [] and other_obj['bsz'] != []):
-        direction = -1
-    # Calculate the distance between the source and target objects
-    radius = calculate_distance(my_pos, other_pos)
-    # Probably, the frontend will present multiple  incoming vehicle from all directions.
-    vector = {
-        "d": direction,  # Direction angle
-        "r": radius,  # Distance radius
-        "f": contactIsFuzzy
-    }
+    # Merge datastreams by ID, keeping the ones not present in the update
+    if 'datastreams' in record and 'datastreams' in update:
+        streams = {stream.get('id'): stream for stream in record['datastreams']}
+        streams.update((stream.get('id'), stream) for stream in update['datastreams'])
+        merged['datastreams'] = list(streams.values())
 
-    return vector
+    return merged
 
 
-def _extract_pos(response, pos_id):
+def create_all_vectors(positions, headings, fuzzy):
     """
-    Extract position (X or Y) from the response.
+    Create the vectors between every object and all other objects.
 
     Args:
-        response (dict): The response data containing various datastreams.
-        pos_id (str): The position identifier ('posX' or 'posY') to extract.
+        positions (numpy.ndarray): (N, 2) array with the position of each object, NaN where unknown.
+        headings (numpy.ndarray): (N,) array with the heading of each object, NaN where unknown.
+        fuzzy (numpy.ndarray): (N,) boolean array, True where the object is inside a bad signal zone.
 
     Returns:
-        float: The extracted position value or None if not found.
+        list: One list of vectors per object (in the same order), each vector containing direction,
+              radius and the fuzzy flag of the target object.
     """
-    # Iterate over each datastream in the response
-    for stream in response.get('datastreams', []):
-        # Check if the current datastream's ID matches the given position ID
-        if stream['id'] == pos_id:
-            # Extract and return the position value as a float
-            return float(stream['current_value'].strip())
+    directions, radii = calculate_vectors(positions, headings)
 
-    # Return None if the position ID is not found in any datastream
-    return None
-
-
-def _extract_zone_names(response, zone_type):
-    """
-    Extract zone names of the given type from the response.
+    # direction = -1 means that the angle between two vehicles cannot be calculated as we don't know the heading of this vehicle,
+    # or that both vehicles are inside a fuzzy position zone.
+    directions[np.outer(fuzzy, fuzzy)] = -1
 
-    Args:
-        response (dict): The response data containing zone information.
-        zone_type (str): The zone type prefix ('M' for moving zones, 'L' for warning lights zones).
+    # Vectors can only be created between objects with a known position
+    located = np.flatnonzero(~np.isnan(radii.diagonal())).tolist()
 
-    Returns:
-        list: A list of zone names matching the given zone type.
-    """
-    zone_names = []
+    # Convert the matrices to Python values once, instead of element by element.
+    # Directions towards targets with an unknown position are NaN, they are mapped to -1 before the cast.
+    d_rows = np.nan_to_num(directions, nan=-1).astype(int).tolist()
+    r_rows = radii.tolist()
+    fuzzy = fuzzy.tolist()
 
-    # Check if the response is a dictionary and contains the 'zones' key
-    if isinstance(response, dict) and 'zones' in response:
-        # Iterate over each zone in the response
-        for zone in response['zones']:
-            # Check if the zone name starts with the given zone type prefix
-            if zone.get('zone_name', '').startswith(zone_type):
-                # Append the zone name to the list of zone names
-                zone_names.append(zone['zone_name'])
+    vectors_arrays = [[] for _ in fuzzy]
+    for i in located:
+        d_row = d_rows[i]
+        r_row = r_rows[i]
+        # Probably, the frontend will present multiple  incoming vehicle from all directions.
+        vectors_arrays[i] = [{
+            "d": d_row[j],  # Direction angle
+            "r": r_row[j],  # Distance radius
+            "f": fuzzy[j]   # Target is inside a fuzzy position zone
+        } for j in located if j != i]  # Skip vector creation if comparing the object with itself
 
-    return zone_names
+    return vectors_arrays
 
 
-def _extract_tms(response):
+def _parse_record(response):
     """
-    Extract timestamps from 'posY' and 'posX' streams in the response and return the latest one.
+    Extract position, timestamp and zone names from the response in a single pass.
 
     Args:
-        response (dict): The response data containing datastreams.
+        response (dict): The response data containing datastreams and zone information.
 
     Returns:
-        float: The latest timestamp as a Unix timestamp, or None if no valid timestamp is found.
+        tuple: (pos, tms, mvz, liz, bsz) where
+               - pos (tuple): The (X, Y) position, each value None if not found.
+               - tms (float): The latest 'posX'/'posY' timestamp as a Unix timestamp, or None if not found.
+               - mvz, liz, bsz (list): Moving, warning lights and bad signal zone names ('M', 'L', 'B' prefixes).
     """
-    datetime_format = '%Y-%m-%d %H:%M:%S.%f'  # Expected format for timestamps
-    max_timestamp = None  # Initialize to track the latest timestamp
+    pos_x = pos_y = tms = None
 
-    # Iterate over each datastream in the response
+    # Iterate once over the datastreams, picking up both coordinates and their timestamps
     for stream in response.get('datastreams', []):
-        # Check if the datastream's ID is either 'posY' or 'posX'
-        if stream.get('id') in {'posY', 'posX'}:
+        stream_id = stream.get('id')
+        if stream_id == 'posX' or stream_id == 'posY':
+            # Keep the first value found for each coordinate
+            if stream_id == 'posX' and pos_x is None:
+                pos_x = float(stream['current_value'].strip())
+            elif stream_id == 'posY' and pos_y is None:
+                pos_y = float(stream['current_value'].strip())
+
+            # Keep the latest timestamp of the position streams
             datetime_str = stream.get('at')  # Retrieve the timestamp string
             if datetime_str:
                 try:
-                    # Convert the timestamp string to a Unix timestamp
-                    current_timestamp = datetime.strptime(
-                        datetime_str, datetime_format).timestamp()
-                    # Update max_timestamp if the current timestamp is newer
-                    if max_timestamp is None or current_timestamp > max_timestamp:
-                        max_timestamp = current_timestamp
+                    current_timestamp = _parse_tms(datetime_str)
+                    if tms is None or current_timestamp > tms:
+                        tms = current_timestamp
                 except ValueError as e:
-                    # Print error message if timestamp parsing fails
-                    print(f"Error parsing timestamp for {stream['id']}: {e}")
+                    # Log error message if timestamp parsing fails
+                    logger.warning("Error parsing timestamp for %s: %s", stream_id, e)
+
+    # Iterate once over the zones, sorting each name by its type prefix
+    mvz, liz, bsz = [], [], []
+    get_zone_names = {'M': mvz, 'L': liz, 'B': bsz}.get
+    for zone in response.get('zones', []):
+        try:
+            zone_name = zone['zone_name']
+        except KeyError:
+            # Skip zones without a name
+            continue
+
+        zone_names = get_zone_names(zone_name[:1])
+        if zone_names is not None:
+            zone_names.append(zone_name)
+
+    return (pos_x, pos_y), tms, mvz, liz, bsz
+
+
+@lru_cache(maxsize=1024)
+def _parse_tms(datetime_str):
+    """
+    Convert a datastream timestamp string to a Unix timestamp.
 
-    return max_timestamp
+    Results are memoized, as 'posX' and 'posY' usually share the same timestamp and
+    stationary tags report the same timestamp on every poll.
+
+    Args:
+        datetime_str (str): The timestamp string in the format 'YYYY-MM-DD HH:MM:SS.ffffff'.
+
+    Returns:
+        float: The Unix timestamp.
+
+    Raises:
+        ValueError: If the string is not a valid timestamp.
+    """
+    # fromisoformat is implemented in C and much faster than strptime for this fixed format
+    return datetime.fromisoformat(datetime_str).timestamp()
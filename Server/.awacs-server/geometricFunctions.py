@@ -6,9 +6,11 @@ This module provides functions for calculating distance and angle between points
 
 Dependencies:
 - math: Standard Python library for mathematical operations.
+- numpy: Library for vectorized array operations.
 """
 
 import math
+import numpy as np
 
 
 def calculate_angle(myCoordinates, othersCoordinates, myHeading):
@@ -49,13 +51,14 @@ def calculate_distance(coordinates_1, coordinates_2):
         coordinates_2 (tuple): Tuple containing the (x, y) coordinates of the second point.
 
     Returns:
-        float: The Euclidean distance between the two points, rounded to 1 decimal place.
+        float: The Euclidean distance between the two points, in full precision
+               (round it only when presenting the value).
     """
     X1, Y1 = coordinates_1
     X2, Y2 = coordinates_2
 
-    # Calculate the Euclidean distance using the distance formula
-    return round(math.sqrt((X2 - X1)**2 + (Y2 - Y1)**2), 1)
+    # Calculate the Euclidean distance with a single hypot call
+    return math.hypot(X2 - X1, Y2 - Y1)
 
 
 def calculate_heading(coordinates_1, coordinates_2):
@@ -120,3 +123,49 @@ def calculate_speed(coordinates_1, tmsStart, coordinates_2, tmsEnd):
     spd_kMpHr = spd_MpHr / 1000
 
     return round(spd_kMpHr, 1)
+
+
+def calculate_vectors(positions, headings):
+    """
+    Calculate the directions and distances between every pair of points at once.
+
+    This is the vectorized equivalent of calling `calculate_angle` and `calculate_distance`
+    for every (observer, target) pair, computed over the whole position array with NumPy.
+
+    Args:
+        positions (numpy.ndarray): (N, 2) array with the (x, y) position of each observer/target, NaN where unknown.
+        headings (numpy.ndarray): (N,) array with the observer headings in degrees, NaN where unknown.
+
+    Returns:
+        tuple: Two (N, N) arrays where row i holds the values from observer i to every target j:
+               - directions: Angles relative to the observer's heading in the range [0, 360), -1 if the
+                 observer's heading is unknown, or NaN if a position is unknown.
+               - distances: Euclidean distances rounded to 1 decimal place (NaN if a position is unknown).
+    """
+    pos = np.array(positions, dtype=np.float64).reshape(-1, 2)
+    hdg = np.array(headings, dtype=np.float64)
+
+    # Coordinate differences from observer i (rows) to target j (columns)
+    dx = pos[None, :, 0] - pos[:, None, 0]
+    dy = pos[None, :, 1] - pos[:, None, 1]
+
+    # Euclidean distance between every pair
+    distances = np.hypot(dx, dy)
+    np.round(distances, 1, out=distances)
+
+    # Heading from observer to target, clockwise from the positive y-axis (see calculate_heading).
+    # The remaining steps run in place on the dx/dy buffers to avoid allocating N x N temporaries.
+    np.negative(dy, out=dy)
+    directions = np.arctan2(dy, dx, out=dx)
+    np.degrees(directions, out=directions)
+    np.subtract(90, directions, out=directions)
+    np.mod(directions, 360, out=directions)
+    np.rint(directions, out=directions)
+
+    # Angle relative to the observer's heading, normalized to the range [0, 360)
+    directions -= hdg[:, None]
+    directions += 360
+    np.mod(directions, 360, out=directions)
+    directions[np.isnan(hdg)] = -1
+
+    return directions, distances
@@ -6,13 +6,28 @@ This module contains functions for controlling lights based on zone penetration
 
 Dependencies:
 - requests: Library for making HTTP requests.
+- logging: Standard Python library for reporting control errors.
 - time: Standard Python library for time-related functions.
 - config: Configuration file containing zone pin mapping and control URLs.
 """
 
+import logging
 import requests
-import time
-from config import ZONE_PIN_MAP, GPIO_SERVER_URL, GPIO_SERVER_HEADER
+from requests.adapters import HTTPAdapter
+from time import monotonic
+from config import ZONE_PIN_MAP, GPIO_SERVER_BATCH_URL, GPIO_SERVER_HEADER, LIGHTS_REFRESH_PERIOD
+
+logger = logging.getLogger(__name__)
+
+# Persistent HTTP session so every command reuses the same keep-alive connection to the GPIO server.
+# urllib3 already sets TCP_NODELAY on its sockets, so small commands are not delayed by Nagle.
+session = requests.Session()
+session.headers.update(GPIO_SERVER_HEADER)
+session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+# Last state successfully sent for each pin, and when all pins were last sent
+_last_states = {}
+_last_refresh = None
 
 
 def set_all_lights(state):
@@ -23,61 +38,76 @@ def set_all_lights(state):
         state (bool): Boolean indicating the state to set (True for ON, False for OFF).
 
     Description:
-        This function iterates over all the light pins defined in ZONE_PIN_MAP and sets each pin to the specified state.
-        A delay is introduced between setting each pin to prevent overwhelming the server with rapid requests.
+        This function sets every light pin defined in ZONE_PIN_MAP to the specified state with a single batch request.
     """
-    for pin in ZONE_PIN_MAP.values():
-        _control_light_pin(pin, state)  # Control the state of the light pin
-        time.sleep(0.4)  # Introduce a delay to avoid overwhelming the server
+    global _last_refresh
+
+    if _control_light_pins({pin: state for pin in ZONE_PIN_MAP.values()}):
+        _last_refresh = monotonic()
 
 
-def check_zones(objects):
+def check_zones(penetrated_zones):
     """
-    Check the penetration status of zones and control the lights accordingly.
+    Control the lights according to the penetration status of the zones.
 
     Args:
-        objects (dict): A dictionary where each key is an object ID and each value is a dictionary containing object information.
-                        Each object should include a list of zone names under the "liz" key, which indicates warning lights zones.
+        penetrated_zones (set): The names of the warning lights zones that currently contain at least one object.
 
     Description:
-        This function determines which zones are currently penetrated by checking each object's zone list.
-        It then controls the corresponding lights based on whether each zone is penetrated or not.
+        This function controls the light of each zone based on whether the zone is penetrated or not,
+        sending only the pins whose state changed in a single batch request. All pins are resent every
+        LIGHTS_REFRESH_PERIOD seconds, so the lights recover if the GPIO server loses its state.
     """
-    # Determine which zones are currently penetrated
-    penetrated_zones = {zone for obj in objects.values()
-                        for zone in obj.get("liz", [])}
+    global _last_refresh
+
+    # Set the light to ON if the zone is not penetrated; otherwise, set it to OFF
+    pin_states = {pin: zone not in penetrated_zones
+                  for zone, pin in ZONE_PIN_MAP.items()}
+
+    # Resend all pins periodically, otherwise only the pins whose state changed
+    refresh = _last_refresh is None or monotonic() - _last_refresh >= LIGHTS_REFRESH_PERIOD
+    if not refresh:
+        pin_states = {pin: state for pin, state in pin_states.items()
+                      if _last_states.get(pin) != state}
+        if not pin_states:
+            return
 
     # Control the lights for each zone based on its penetration status
-    for zone, pin in ZONE_PIN_MAP.items():
-        # Set the light to ON if the zone is not penetrated; otherwise, set it to OFF
-        _control_light_pin(pin, zone not in penetrated_zones)
+    if _control_light_pins(pin_states) and refresh:
+        _last_refresh = monotonic()
 
 
-def _control_light_pin(pin, state):
+def _control_light_pins(pin_states):
     """
-    Control the state of a light pin.
+    Control the state of several light pins at once.
 
     Args:
-        pin (int): The pin number of the light to control.
-        state (bool): Boolean indicating the desired state for the light.
-                      True for ON, False for OFF.
+        pin_states (dict): A dictionary mapping pin numbers to the desired state for each light.
+                           True for ON, False for OFF.
 
     Description:
-        Sends a command to the GPIO server to set the specified light pin to the desired state.
+        Sends all commands to the GPIO server in one batch request, so a cycle costs a single round-trip
+        regardless of the number of pins, and records the sent states on success.
         Handles exceptions that occur during the HTTP request to ensure that any errors are logged.
+
+    Returns:
+        bool: True if the GPIO server accepted the commands, otherwise False.
     """
     try:
-        # Prepare the command payload
-        cmd = {"pin": pin, "state": state}
+        # Prepare the batch command payload
+        cmds = [{"pin": pin, "state": state} for pin, state in pin_states.items()]
 
-        # Send the command to the GPIO server
-        response = requests.post(
-            GPIO_SERVER_URL, json=cmd, headers=GPIO_SERVER_HEADER
-        )
+        # Send the commands to the GPIO server
+        response = session.post(GPIO_SERVER_BATCH_URL, json=cmds, timeout=0.5)
 
         # Raise an exception if the HTTP response indicates an error
         response.raise_for_status()
 
+        # Remember the states that are now set on the GPIO server
+        _last_states.update(pin_states)
+        return True
+
     except requests.exceptions.RequestException as e:
-        # Print an error message if an exception occurs
-        print(f"Error controlling pin {pin}: {e}")
+        # Log an error message if an exception occurs
+        logger.warning("Error controlling pins %s: %s", list(pin_states), e)
+        return False
@@ -1,7 +1,10 @@
+import logging
 from gpiozero import LED
 from time import sleep
 from config import ZONE_PIN_MAP
 
+logger = logging.getLogger(__name__)
+
 # Dictionary to hold LED objects
 leds = {pin: LED(pin) for pin in ZONE_PIN_MAP.values()}
 
@@ -18,16 +21,13 @@ def set_all_lights(state):
         sleep(0.8)  # Introduce a delay to prevent overwhelming the system
 
 
-def check_zones(objects):
+def check_zones(penetrated_zones):
     """
-    Check zone penetration status and control lights accordingly.
+    Control lights according to zone penetration status.
 
     Args:
-        objects (dict): Dictionary containing object information. Each object should have a list of zone names under the "liz" key.
+        penetrated_zones (set): Names of the warning lights zones that currently contain at least one object.
     """
-    penetrated_zones = {zone for obj in objects.values()
-                        for zone in obj["liz"]}
-
     for zone, pin in ZONE_PIN_MAP.items():
         # Set the light to ON if the zone is not penetrated, otherwise OFF
         _control_light_pin(pin, zone not in penetrated_zones)
@@ -53,4 +53,4 @@ def _control_light_pin(pin, state):
             led.off()
 
     except Exception as e:
-        print(f"Error controlling pin {pin}: {e}")
+        logger.warning("Error controlling pin %s: %s", pin, e)
@@ -0,0 +1,111 @@
+"""
+Module: locServerFeed
+File: locServerFeed.py
+
+This module subscribes to the WebSocket API of the location server and delivers tag updates as soon as they are
+pushed, instead of waiting for the next HTTP poll.
+
+Dependencies:
+- websockets: Library for WebSocket clients.
+- orjson (optional, falls back to json): Library for fast JSON decoding.
+- logging: Standard Python library for reporting connection errors.
+- config: Configuration module for defining the WebSocket URL and subscription command.
+"""
+
+import logging
+from json import dumps
+from threading import Thread, Event
+from time import sleep, monotonic
+from websockets.sync.client import connect
+from config import RTLS_WS_API_URL, RTLS_WS_SUB_COMMAND, RTLS_WS_RECONNECT_DELAY, RTLS_WS_STALE_TIMEOUT
+
+try:
+    # orjson decodes several times faster than json
+    from orjson import loads
+except ImportError:
+    from json import loads
+
+logger = logging.getLogger(__name__)
+
+
+def start_feed(on_tag):
+    """
+    Start receiving tag updates from the RTLS WebSocket API in a background thread.
+
+    Args:
+        on_tag (callable): Function called with each tag record (dict) pushed by the location server.
+
+    Returns:
+        threading.Event: Event that is set while tag records are being received, and cleared while reconnecting
+                         or when no tag record has arrived for RTLS_WS_STALE_TIMEOUT seconds.
+    """
+    connected = Event()
+    Thread(target=_run_feed, args=(on_tag, connected), daemon=True).start()
+
+    return connected
+
+
+def _run_feed(on_tag, connected):
+    """
+    Keep the subscription to the RTLS WebSocket API alive and dispatch the received tag records.
+
+    Args:
+        on_tag (callable): Function called with each tag record pushed by the location server.
+        connected (threading.Event): Event reflecting whether the feed is delivering tag records.
+    """
+    while True:
+        try:
+            with connect(RTLS_WS_API_URL) as websocket:
+                # Subscribe to the tag feeds
+                websocket.send(dumps(RTLS_WS_SUB_COMMAND))
+                last_tag = None  # Time the last tag record was received on this connection
+
+                while True:
+                    # Wait for the next message, waking up regularly to check that the feed isn't stale
+                    try:
+                        message = websocket.recv(timeout=RTLS_WS_STALE_TIMEOUT)
+                    except TimeoutError:
+                        message = None
+
+                    tag = None
+                    if message is not None:
+                        try:
+                            tag = _extract_tag(loads(message))
+                        except ValueError as e:
+                            # Skip a malformed message without dropping the subscription
+                            logger.warning("Invalid RTLS feed message: %s", e)
+
+                    if tag is not None:
+                        # The feed is only considered connected once it actually delivers tag records
+                        last_tag = monotonic()
+                        connected.set()
+                        on_tag(tag)
+                    elif last_tag is None or monotonic() - last_tag >= RTLS_WS_STALE_TIMEOUT:
+                        # No tag record for a while (or the subscription yields none), let the working loop poll
+                        connected.clear()
+
+        except Exception as e:
+            # Log an error message if the connection fails or drops
+            logger.warning("RTLS feed error: %s", e)
+
+        # Wait before reconnecting
+        connected.clear()
+        sleep(RTLS_WS_RECONNECT_DELAY)
+
+
+def _extract_tag(message):
+    """
+    Extract the tag record from a message pushed by the location server.
+
+    Args:
+        message (dict): The decoded WebSocket message.
+
+    Returns:
+        dict or None: The tag record carried in the message body, or None for other messages (e.g. acknowledgements).
+    """
+    body = message.get('body') if isinstance(message, dict) else None
+
+    if isinstance(body, dict) and 'id' in body:
+        return body
+
+    return None
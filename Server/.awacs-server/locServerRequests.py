@@ -6,62 +6,280 @@ This module contains functions for making requests to the location server and pr
 
 Dependencies:
 - requests: Library for making HTTP requests.
+- httpx (optional, only for the async functions): Library for making asynchronous HTTP requests.
+- ijson (optional, only for GetTagsStream): Library for iterative JSON parsing.
+- orjson (optional, falls back to json): Library for fast JSON decoding.
+- logging: Standard Python library for reporting request errors.
 - config: Configuration module for defining API URLs and headers.
 """
 
+import asyncio
+import atexit
+import logging
 import requests
-from config import RTLS_HTTP_API_URL, RTLS_HEADERS
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import RTLS_HTTP_API_URL, RTLS_HEADERS, RTLS_TIMEOUT, RTLS_MAX_WORKERS
+
+try:
+    # orjson decodes several times faster than json, directly from the response bytes
+    from orjson import loads
+except ImportError:
+    from json import loads
+
+logger = logging.getLogger(__name__)
+
+# Persistent HTTP session so every request reuses the same keep-alive connections to the RTLS server,
+# with the API headers set once and transient gateway errors retried.
+# The pool holds a connection per concurrent request made by GetTags.
+_session = requests.Session()
+_session.headers.update(RTLS_HEADERS)
+_session.mount("http://", HTTPAdapter(
+    pool_connections=1, pool_maxsize=RTLS_MAX_WORKERS,
+    max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504])))
+atexit.register(_session.close)
+
+# Base URL of the single tag endpoints, built once instead of on every GetTag call
+_TAG_BASE = RTLS_HTTP_API_URL.rstrip('/') + '/'
+
+# Shared asynchronous HTTP client, created on first use by the async functions, and the event loop it belongs to
+_async_client = None
+_async_client_loop = None
+
+# Validators (ETag / Last-Modified) and decoded body of the last response of each endpoint, keyed by URL.
+# Entries are replaced as a whole, so concurrent GetTag calls never see a half-updated one.
+_cache = {}
 
 
 def GetAllTags():
     """
     Fetch the full data from the RTLS HTTP API.
 
+    The request is conditional: if the server reports that the data hasn't changed since the last
+    response (304 Not Modified), the previously decoded data is returned without downloading or decoding it again.
+    See `_get_json`: the returned data may be shared with other callers and must not be mutated.
+
     Returns:
         dict or None: The full JSON response from the API if successful, otherwise None.
+    """
+    return _get_json(RTLS_HTTP_API_URL)
+
+
+def GetTag(id):
+    """
+    Fetch data for a specific tag from the RTLS HTTP API.
+
+    Like GetAllTags, the request is conditional and an unchanged tag is returned from the previous response,
+    which must not be mutated.
+
+    Args:
+        id (int or str): The ID of the tag to retrieve.
+
+    Returns:
+        dict or None: The JSON response for the tag if successful, otherwise None.
+    """
+    return _get_json(_tag_url(id))
+
+
+def _get_json(url):
+    """
+    Fetch and decode a JSON document from the RTLS HTTP API with a conditional request.
+
+    If the document hasn't changed (304 Not Modified), the very object returned by the previous call is returned
+    again, so callers can detect unchanged data with `is`. That object is shared by every caller of the URL
+    (including the concurrent GetTag calls of GetTags) and is kept as the cached data, so it must not be mutated.
+
+    Args:
+        url (str): The URL of the document.
+
+    Returns:
+        dict or None: The JSON response if successful (the cached object if unchanged), otherwise None.
 
     Raises:
         HTTPError: If the HTTP request returns an unsuccessful status code.
         RequestException: For other issues related to the request.
     """
+    validators, data = _cache.get(url, ({}, None))
+
     try:
-        response = requests.get(RTLS_HTTP_API_URL, headers=RTLS_HEADERS)
+        response = _session.get(url, headers=validators, timeout=RTLS_TIMEOUT)
+
+        # Reuse the previous data if it hasn't changed
+        if response.status_code == 304 and data is not None:
+            return data
+
         response.raise_for_status()  # Raises an HTTPError for bad responses (4xx, 5xx)
-        return response.json()
+        data = loads(response.content)
+
+        # Remember the validators of this response for the next conditional request
+        validators = {}
+        if 'ETag' in response.headers:
+            validators['If-None-Match'] = response.headers['ETag']
+        if 'Last-Modified' in response.headers:
+            validators['If-Modified-Since'] = response.headers['Last-Modified']
+        if validators:
+            _cache[url] = (validators, data)
+        else:
+            _cache.pop(url, None)
+
+        return data
     except requests.exceptions.HTTPError as http_err:
-        print(f"HTTP error occurred: {http_err}")
+        logger.warning("HTTP error occurred: %s", http_err)
     except requests.exceptions.RequestException as req_err:
-        print(f"Request error occurred: {req_err}")
+        logger.warning("Request error occurred: %s", req_err)
     except Exception as err:
-        print(f"An unexpected error occurred: {err}")
+        logger.error("An unexpected error occurred: %s", err)
 
     return None  # Return None explicitly if there's an error
 
 
-def GetTag(id):
+@lru_cache(maxsize=512)
+def _tag_url(id):
     """
-    Fetch data for a specific tag from the RTLS HTTP API.
+    Get the URL of a single tag endpoint, cached per tag ID since the same tags are polled repeatedly.
 
     Args:
-        id (int or str): The ID of the tag to retrieve.
+        id (int or str): The ID of the tag.
 
     Returns:
-        dict or None: The JSON response for the tag if successful, otherwise None.
+        str: The URL of the tag in the RTLS HTTP API.
+    """
+    return _TAG_BASE + str(id)
 
-    Raises:
-        HTTPError: If the HTTP request returns an unsuccessful status code.
-        RequestException: For other issues related to the request.
+
+def GetTags(ids, max_workers=RTLS_MAX_WORKERS):
+    """
+    Fetch data for several tags from the RTLS HTTP API concurrently.
+
+    The requests share the persistent session, so the total latency is that of the slowest request
+    instead of the sum of all of them.
+
+    Args:
+        ids (iterable): The IDs (int or str) of the tags to retrieve.
+        max_workers (int): The maximum number of concurrent requests. Values above RTLS_MAX_WORKERS
+                           exceed the connection pool of the session.
+
+    Returns:
+        list: The JSON response for each tag (see `GetTag`), in the order of the given IDs.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(GetTag, ids))
+
+
+def GetTagsStream(fields=('id', 'alias', 'datastreams', 'zones')):
     """
+    Fetch all tags from the RTLS HTTP API, yielding each tag as soon as it is parsed.
+
+    The response is parsed incrementally while it is downloaded, so only one tag is held in memory at a time
+    instead of the whole response.
+
+    Args:
+        fields (tuple): The fields to keep from each tag (fields missing from a tag are left out, as in the full response).
+
+    Yields:
+        dict: The requested fields of each tag.
+    """
+    import ijson
+
     try:
-        response = requests.get(
-            f'{RTLS_HTTP_API_URL}/{id}', headers=RTLS_HEADERS)
-        response.raise_for_status()  # Raises an HTTPError for bad responses (4xx, 5xx)
-        return response.json()
+        with _session.get(RTLS_HTTP_API_URL, stream=True, timeout=RTLS_TIMEOUT) as response:
+            response.raise_for_status()  # Raises an HTTPError for bad responses (4xx, 5xx)
+            response.raw.decode_content = True  # Let urllib3 undo any content encoding
+
+            for tag in ijson.items(response.raw, 'results.item', use_float=True):
+                yield {field: tag[field] for field in fields if field in tag}
     except requests.exceptions.HTTPError as http_err:
-        print(f"HTTP error occurred: {http_err}")
+        logger.warning("HTTP error occurred: %s", http_err)
     except requests.exceptions.RequestException as req_err:
-        print(f"Request error occurred: {req_err}")
+        logger.warning("Request error occurred: %s", req_err)
     except Exception as err:
-        print(f"An unexpected error occurred: {err}")
+        logger.error("An unexpected error occurred: %s", err)
+
+
+def _get_async_client():
+    """
+    Get the shared asynchronous HTTP client of the running event loop, creating it on first use.
+
+    The connections of a client are bound to the event loop that opened them, so a new client is created
+    whenever the async functions are called from another loop (e.g. a later `asyncio.run`).
+
+    Returns:
+        httpx.AsyncClient: The client, with the API headers set and its connections kept alive between requests.
+    """
+    global _async_client, _async_client_loop
+
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop:
+        import httpx
+        _async_client_loop = loop
+        _async_client = httpx.AsyncClient(
+            headers=RTLS_HEADERS,
+            timeout=httpx.Timeout(RTLS_TIMEOUT[1], connect=RTLS_TIMEOUT[0]),
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64))
+
+    return _async_client
+
+
+async def _get_json_async(url):
+    """
+    Fetch and decode a JSON document from the RTLS HTTP API asynchronously.
+
+    Args:
+        url (str): The URL of the document.
+
+    Returns:
+        dict or None: The JSON response if successful, otherwise None for request errors and invalid responses.
+        Other errors (e.g. misuse of the client) are raised rather than reported as None.
+    """
+    import httpx
+
+    try:
+        response = await _get_async_client().get(url)
+        response.raise_for_status()  # Raises an HTTPStatusError for bad responses (4xx, 5xx)
+        return loads(response.content)
+    except httpx.HTTPStatusError as http_err:
+        logger.warning("HTTP error occurred: %s", http_err)
+    except httpx.RequestError as req_err:
+        logger.warning("Request error occurred: %s", req_err)
+    except ValueError as err:
+        logger.error("Invalid JSON response: %s", err)
 
     return None  # Return None explicitly if there's an error
+
+
+async def GetAllTagsAsync():
+    """
+    Fetch the full data from the RTLS HTTP API asynchronously.
+
+    Returns:
+        dict or None: The full JSON response from the API if successful, otherwise None.
+    """
+    return await _get_json_async(RTLS_HTTP_API_URL)
+
+
+async def GetTagAsync(id):
+    """
+    Fetch data for a specific tag from the RTLS HTTP API asynchronously.
+
+    Args:
+        id (int or str): The ID of the tag to retrieve.
+
+    Returns:
+        dict or None: The JSON response for the tag if successful, otherwise None.
+    """
+    return await _get_json_async(_tag_url(id))
+
+
+async def GetTagsAsync(ids):
+    """
+    Fetch data for several tags from the RTLS HTTP API concurrently, on a single event loop.
+
+    Args:
+        ids (iterable): The IDs (int or str) of the tags to retrieve.
+
+    Returns:
+        list: The JSON response for each tag (see `GetTagAsync`), in the order of the given IDs.
+    """
+    return await asyncio.gather(*[GetTagAsync(id) for id in ids])
@@ -0,0 +1,133 @@
+"""
+Module: tagStore
+File: tagStore.py
+
+This module defines the store that holds the state of all RTLS tags. The per-tag objects are kept as dictionaries,
+as they are published as-is to the MQTT broker, while the values used by the vector calculations are also kept as
+columns (one NumPy array per value, one slot per tag) so they can be processed for all tags at once.
+
+Dependencies:
+- numpy: Library for vectorized array operations.
+- dataProcessing: Module containing functions for creating and updating objects.
+"""
+
+import numpy as np
+from collections import Counter
+from dataProcessing import createObject, updateObject, merge_record, create_all_vectors
+
+
+class TagStore:
+    """
+    Store of the RTLS tag objects, indexed by tag ID.
+
+    Attributes:
+        ids (list): The tag ID of each slot.
+        idx (dict): The slot of each tag ID.
+        objects (dict): The object of each tag ID (see `createObject`).
+        records (dict): The last full record received from the location server for each tag ID.
+        pos (numpy.ndarray): (N, 2) array with the position of each slot, NaN where unknown.
+        hdg (numpy.ndarray): (N,) array with the heading of each slot, NaN where unknown.
+        fuzzy (numpy.ndarray): (N,) boolean array, True where the slot is inside a bad signal zone.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.idx = {}
+        self.objects = {}
+        self.records = {}
+        self.pos = np.empty((0, 2), dtype=np.float64)
+        self.hdg = np.empty(0, dtype=np.float64)
+        self.fuzzy = np.empty(0, dtype=bool)
+        self._liz_counter = Counter()  # Number of tags inside each warning lights zone, kept up to date on every update
+
+    def __contains__(self, tag_id):
+        return tag_id in self.idx
+
+    def add(self, tag_id, record):
+        """
+        Create the object of a new tag and assign it a slot.
+
+        Args:
+            tag_id (int): The ID of the tag.
+            record (dict): The record of the tag received from the location server.
+        """
+        self.idx[tag_id] = len(self.ids)
+        self.ids.append(tag_id)
+        self.objects[tag_id] = createObject(tag_id, record)
+        self.records[tag_id] = record
+
+        # Grow the columns by one slot
+        self.pos = np.vstack((self.pos, np.full((1, 2), np.nan)))
+        self.hdg = np.append(self.hdg, np.nan)
+        self.fuzzy = np.append(self.fuzzy, False)
+        self._sync(tag_id)
+        self._liz_counter.update(self.objects[tag_id]['liz'])
+
+    def update(self, tag_id, record):
+        """
+        Update the object of a tag with a full record.
+
+        Position data older than the object's current timestamp is ignored (see `updateObject`), so an HTTP snapshot
+        fetched while feed pushes were applied can't undo them.
+
+        Args:
+            tag_id (int): The ID of the tag.
+            record (dict): The record of the tag received from the location server.
+        """
+        obj = self.objects[tag_id]
+        previous_liz = obj['liz']
+
+        self.records[tag_id] = record
+        updateObject(obj, record)
+        self._sync(tag_id)
+
+        # Move the tag between the warning lights zone counts if its zones changed
+        if obj['liz'] != previous_liz:
+            for zone in previous_liz:
+                self._liz_counter[zone] -= 1
+                if self._liz_counter[zone] == 0:
+                    del self._liz_counter[zone]  # Zone no longer penetrated
+            self._liz_counter.update(obj['liz'])
+
+    def merge(self, tag_id, update):
+        """
+        Update the object of a tag with a (possibly partial) record pushed by the location server feed.
+
+        Args:
+            tag_id (int): The ID of the tag.
+            update (dict): The record pushed by the location server.
+        """
+        self.update(tag_id, merge_record(self.records.get(tag_id, {}), update))
+
+    def penetrated_zones(self):
+        """
+        Get the warning lights zones that currently contain at least one tag.
+
+        Returns:
+            set: The names of the penetrated warning lights zones.
+        """
+        return set(self._liz_counter)
+
+    def update_vectors(self):
+        """
+        Create the vectors between every tag and all other tags and store them in the objects.
+        """
+        vectors_arrays = create_all_vectors(self.pos, self.hdg, self.fuzzy)
+
+        for tag_id, vectors_array in zip(self.ids, vectors_arrays):
+            self.objects[tag_id]['vct'] = vectors_array
+
+    def _sync(self, tag_id):
+        """
+        Copy the values used by the vector calculations from the object of a tag to its slot.
+
+        Args:
+            tag_id (int): The ID of the tag.
+        """
+        obj = self.objects[tag_id]
+        slot = self.idx[tag_id]
+
+        # Unknown (None) values are stored as NaN
+        self.pos[slot] = obj['pos']
+        self.hdg[slot] = np.nan if obj['hdg'] is None else obj['hdg']
+        self.fuzzy[slot] = obj['bsz'] != []
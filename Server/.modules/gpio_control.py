@@ -1,63 +1,198 @@
-from http.server import BaseHTTPRequestHandler, HTTPServer
-import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import Future
+from queue import SimpleQueue, Empty
+from threading import Thread, local
+from time import monotonic
 from gpiozero import LED
 
-# Dictionary to map pin numbers to LED objects
-leds = {}
+try:
+    # orjson parses the request body directly from the receive buffer, several times faster than json
+    from orjson import loads
+except ImportError:
+    from json import loads as json_loads
+
+    def loads(data):
+        """Parse JSON from a memoryview or bytes (json does not accept memoryviews)."""
+        return json_loads(bytes(data))
+
+logger = logging.getLogger(__name__)
+
+# GPIO pins that may be controlled (the light pins of ZONE_PIN_MAP in the awacs-server config)
+ALLOWED_PINS = (2, 3, 4, 14)
+
+# Table mapping pin numbers (0-27) to LED objects, None for pins that may not be controlled.
+# Only written by the apply_commands thread.
+leds = [None] * 28
+for allowed_pin in ALLOWED_PINS:
+    leds[allowed_pin] = LED(allowed_pin)
+
+# Queue of (pin, state, future) commands waiting to be applied, and the time window (in seconds)
+# over which queued commands are coalesced so only the latest state of each pin is written
+command_queue = SimpleQueue()
+BATCH_WINDOW = 0.002
+
+# Per-thread (i.e. per-connection) receive buffer reused for request bodies up to its size
+BUFFER_SIZE = 4096
+buffers = local()
+
+def response(status, body, connection=b'keep-alive'):
+    """Build a complete HTTP/1.1 response with the given status line, body and Connection header."""
+    return b'HTTP/1.1 %s\r\nContent-Length: %d\r\nConnection: %s\r\n\r\n%s' % (status, len(body), connection, body)
+
+# Pre-encoded responses, each sent with a single write
+ERR_MISSING = response(b'400 Bad Request', b'{"error": "Pin number and state must be provided"}')
+ERR_PIN = response(b'400 Bad Request', b'{"error": "Invalid pin number"}')
+ERR_STATE = response(b'400 Bad Request', b'{"error": "Invalid state value"}')
+ERR_JSON = response(b'400 Bad Request', b'{"error": "Invalid JSON body"}')
+ERR_GPIO = response(b'500 Internal Server Error', b'{"error": "Failed to set pin state"}')
+# Sent when the request body can't be delimited, so the rest of the connection can't be parsed either
+ERR_LENGTH = response(b'400 Bad Request', b'{"error": "Missing or incomplete request body"}', b'close')
+OK = response(b'200 OK', b'{"success": true}')
+
+# Connection: close variant of each response, sent when the connection ends after the reply
+# (the client sent Connection: close, spoke HTTP/1.0, or the request couldn't be delimited)
+CLOSING = {keep_alive: keep_alive.replace(b'\r\nConnection: keep-alive\r\n', b'\r\nConnection: close\r\n', 1)
+           for keep_alive in (ERR_MISSING, ERR_PIN, ERR_STATE, ERR_JSON, ERR_GPIO, ERR_LENGTH, OK)}
+
+def parse_command(command):
+    """Validate a single {"pin", "state"} command and return (pin, state, error response)."""
+    # Get pin number and state from the command
+    pin = command.get('pin') if type(command) is dict else None
+    state = command.get('state') if type(command) is dict else None
+
+    # Valid command: an integer pin that may be controlled and a boolean state
+    if type(pin) is int and type(state) is bool and 0 <= pin < len(leds) and leds[pin] is not None:
+        return pin, state, None
+
+    # Otherwise find out what is wrong with it
+    if pin is None or state is None:
+        return None, None, ERR_MISSING
+    if type(state) is bool:
+        return None, None, ERR_PIN
+    return None, None, ERR_STATE
+
+def apply_commands():
+    """Apply the queued commands in batches, writing only the latest state of each pin."""
+    while True:
+        # Wait for a command, then collect the ones arriving within the batch window
+        batch = [command_queue.get()]
+        deadline = monotonic() + BATCH_WINDOW
+        while True:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(command_queue.get(timeout=remaining))
+            except Empty:
+                break
+
+        # Keep the latest state of each pin, along with all the futures waiting for it
+        latest = {}
+        for pin, state, future in batch:
+            futures = latest[pin][1] if pin in latest else []
+            futures.append(future)
+            latest[pin] = (state, futures)
+
+        for pin, (state, futures) in latest.items():
+            try:
+                # Set the state of the LED
+                if state:
+                    leds[pin].on()
+                else:
+                    leds[pin].off()
+
+                for future in futures:
+                    future.set_result(True)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
 
 class RequestHandler(BaseHTTPRequestHandler):
+    # Keep connections open between requests, so clients don't reconnect for every command
+    protocol_version = 'HTTP/1.1'
+    # Send replies without waiting for the ACK of the previous write (Nagle), which delays small responses
+    disable_nagle_algorithm = True
+    # Close idle keep-alive connections after this many seconds, so they don't hold a thread forever
+    timeout = 30
+
+    def log_message(self, format, *args):
+        """Log the access lines of BaseHTTPRequestHandler at debug level instead of writing them to stderr."""
+        logger.debug('%s - ' + format, self.address_string(), *args)
+
+    def log_error(self, format, *args):
+        """Log protocol errors (bad request lines, timeouts) as warnings."""
+        logger.warning('%s - ' + format, self.address_string(), *args)
+
+    def send(self, response):
+        """Send a complete pre-encoded response in a single write, bypassing send_response/end_headers."""
+        if self.close_connection:
+            response = CLOSING[response]
+        self.wfile.write(response)
+
+    def bad_request(self, error):
+        """Reject the request with the given pre-encoded error response."""
+        if error is ERR_LENGTH:
+            # The next request can't be found in the stream, so close the connection after replying
+            self.close_connection = True
+        self.send(error)
+
     def do_POST(self):
         # Extract request data
-        content_length = int(self.headers['Content-Length'])
-        data = self.rfile.read(content_length)
-        payload = json.loads(data.decode('utf-8'))
-
-        # Get pin number and state from the request data
-        pin = payload.get('pin')
-        state = payload.get('state')
-
-        # Check if pin and state are provided
-        if pin is None or state is None:
-            self.send_response(400)
-            self.end_headers()
-            self.wfile.write(json.dumps({'error': 'Pin number and state must be provided'}).encode('utf-8'))
-            return
-
-        # Check if pin is valid (should be an integer)
         try:
-            pin = int(pin)
-        except ValueError:
-            self.send_response(400)
-            self.end_headers()
-            self.wfile.write(json.dumps({'error': 'Invalid pin number'}).encode('utf-8'))
-            return
-
-        # Check if state is valid (should be a boolean)
-        if not isinstance(state, bool):
-            self.send_response(400)
-            self.end_headers()
-            self.wfile.write(json.dumps({'error': 'Invalid state value'}).encode('utf-8'))
-            return
-
-        # Initialize LED object for the pin if not already created
-        if pin not in leds:
-            leds[pin] = LED(pin)
-
-        # Set the state of the LED
-        if state:
-            leds[pin].on()
+            content_length = int(self.headers['Content-Length'])
+        except (TypeError, ValueError):
+            return self.bad_request(ERR_LENGTH)
+        if content_length < 0:
+            return self.bad_request(ERR_LENGTH)
+        if content_length <= BUFFER_SIZE:
+            # Read the body into this thread's reusable buffer instead of a new bytes object
+            if not hasattr(buffers, 'view'):
+                buffers.view = memoryview(bytearray(BUFFER_SIZE))
+            data = buffers.view[:self.rfile.readinto(buffers.view[:content_length])]
         else:
-            leds[pin].off()
+            data = self.rfile.read(content_length)
+        if len(data) != content_length:
+            return self.bad_request(ERR_LENGTH)
+
+        # The body was read in full, so a malformed one only fails this request
+        try:
+            payload = loads(data)
+        except ValueError:
+            return self.bad_request(ERR_JSON)
+
+        # A batch request carries a list of commands, a single request carries one command
+        commands = payload if isinstance(payload, list) else [payload]
+
+        # Validate every command before changing any LED
+        parsed = []
+        for command in commands:
+            pin, state, error = parse_command(command)
+            if error:
+                return self.bad_request(error)
+            parsed.append((pin, state))
+
+        # Queue the commands and wait until they are applied
+        futures = []
+        for pin, state in parsed:
+            future = Future()
+            command_queue.put((pin, state, future))
+            futures.append(future)
+        try:
+            for future in futures:
+                future.result()
+        except Exception:
+            return self.send(ERR_GPIO)
 
         # Send success response
-        self.send_response(200)
-        self.end_headers()
-        self.wfile.write(json.dumps({'success': True}).encode('utf-8'))
+        self.send(OK)
 
 def run_server():
     server_address = ('', 4000)
-    httpd = HTTPServer(server_address, RequestHandler)
-    print(f'Starting gpio-server on {server_address}...')
+    Thread(target=apply_commands, daemon=True).start()
+    httpd = ThreadingHTTPServer(server_address, RequestHandler)
+    logging.basicConfig(level=logging.INFO)
+    logger.info('Starting gpio-server on %s...', server_address)
     httpd.serve_forever()
 
 if __name__ == '__main__':